@@ -0,0 +1,100 @@
+"""Measures the time and memory the checks spend on one document.
+
+Compares the checks sharing one Document against a copy of how they ran
+before it, with every check stripping, unlinking and truncating each line
+itself. The copy is kept here so both are measured on the same tree. Run
+from the top of the repository:
+
+    python benchmarks/preprocessing.py
+"""
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import rplint.checks as _checks  # noqa: E402
+
+PARAGRAPH = [
+    "This is an introduction to [the tutorial](https://realpython.com/) "
+    "that shows how to use Python's `pathlib` module to work with files.\n",
+    "You'll learn a great deal about it, and it is a useful thing to know:\n",
+    "\n",
+    "```python\n",
+    ">>> from pathlib import Path\n",
+    ">>> Path.home()\n",
+    "```\n",
+    "\n",
+    "## Next Section\n",
+    "\n",
+]
+REPEATS = 500
+ROUNDS = 5
+
+
+def measure(name, lint):
+    """Prints the best time of several rounds, then the peak memory of one
+    more round under tracemalloc, which slows it down too much to time."""
+    lines = PARAGRAPH * REPEATS
+    times = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        lint(lines)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    lint(lines)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<10} {min(times):8.3f}s {peak / 1024:10.0f} KiB peak")
+
+
+# the link pattern as remove_links() passed it to re.sub() on every call
+URL_PATTERN = r"""
+    \[                 # literal opening square bracket
+    ([\`\(\)\*\w\s-]*) # the shown text from the line
+    \]                 # literal closing square bracket
+    \s*               # optional whitespace (is this needed?)
+    \(                # literal opening paren
+    ([^\)]*)          # group the url
+    \)                # literal closing paren
+"""
+
+
+def remove_links(line):
+    return re.sub(URL_PATTERN, r"\g<1>", line, flags=re.VERBOSE)
+
+
+def separate(lines):
+    """The LineChecker and WordsChecker run() loops from before Document."""
+    for check in _checks.all_checks().values():
+        if isinstance(check, _checks.WordsChecker):
+            for index, line in enumerate(lines, start=1):
+                check.trunc = _checks.truncate(line)
+                line = remove_links(line)
+                if line.startswith(_checks.CODE_BLOCK_DELIMITER):
+                    check.in_code_block = not check.in_code_block
+                line = line.strip()
+                for word in check._extract(line):
+                    check.check_word(index, word)
+        else:
+            check.lines = [line.strip() for line in lines]
+            for index, line in enumerate(lines, start=1):
+                check.trunc = _checks.truncate(line)
+                line = remove_links(line)
+                if line.startswith(_checks.CODE_BLOCK_DELIMITER):
+                    check.in_code_block = not check.in_code_block
+                check.check_line(index, line)
+
+
+def shared(lines):
+    document = _checks.Document(lines)
+    for check in _checks.all_checks().values():
+        check.run(document)
+
+
+if __name__ == "__main__":
+    print(f"{len(PARAGRAPH) * REPEATS} lines")
+    measure("separate", separate)
+    measure("shared", shared)
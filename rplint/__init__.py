@@ -6,5 +6,6 @@ from .checks import CodeFormatterCheck  # noqa
 from .checks import ContractionsCheck  # noqa
 from .checks import EndingColonCheck  # noqa
 from .checks import LineLengthCheck  # noqa
+from .checks import Document  # noqa
 
 __version__ = "0.8.0"
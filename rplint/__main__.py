@@ -1,11 +1,159 @@
+import copy
+import os
+import subprocess
+import sys
+import time
+
 import click
 
+import rplint.baseline as _baseline
 import rplint.checks as _checks
+import rplint.gitrev as _gitrev
+import rplint.memo as _memo
+import rplint.report as _report
+import rplint.shard as _shard
 
 __version__ = "0.8.0"
 
 
-@click.command("rplint")
+def lint(lines, line_length, cache):
+    """Returns the checks run over lines, and whether all of the results
+    came from the cache, in which case the time taken says little about
+    the file.
+
+    Without a cache every check runs over the whole document, which is
+    quicker for text that doesn't repeat.
+    """
+    checks = _checks.all_checks(line_length)
+    if cache is None:
+        document = _checks.Document(lines)
+        for check in checks.values():
+            check.run(document)
+        return checks, False
+    hits, misses = _memo.run_checks(checks, lines, cache)
+    return checks, hits > 0 and misses == 0
+
+
+class InputError(click.ClickException):
+    """The inputs couldn't be read. Exits with status 2 so that it isn't
+    mistaken for the status 1 of finding errors."""
+
+    exit_code = 2
+
+
+def report_options(command):
+    command = click.option(
+        "--max-diagnostics",
+        type=click.IntRange(min=1),
+        metavar="N",
+        help="Stop after reporting N errors.",
+    )(command)
+    command = click.option(
+        "--summary",
+        is_flag=True,
+        help="Only show the number of errors for each check and file.",
+    )(command)
+    command = click.option(
+        "-q",
+        "--quiet",
+        is_flag=True,
+        help="Show nothing, only set the exit status.",
+    )(command)
+    return command
+
+
+def reporter(quiet, summary, max_diagnostics, show_paths):
+    if quiet:
+        mode = _report.QUIET
+    elif summary:
+        mode = _report.SUMMARY
+    else:
+        mode = _report.FULL
+    return _report.Reporter(mode, max_diagnostics, show_paths)
+
+
+def lint_files(names, line_length, cache):
+    for name in names:
+        start = time.perf_counter()
+        try:
+            with click.open_file(name) as input_file:
+                lines = input_file.readlines()
+        except OSError as e:
+            raise InputError(f"Could not open file {name!r}: {e.strerror}")
+        except UnicodeDecodeError as e:
+            raise InputError(f"Could not read file {name!r}: {e.reason}")
+        checks, cached = lint(lines, line_length, cache)
+        seconds = None if cached else time.perf_counter() - start
+        yield name, name, lines, checks, seconds
+
+
+def lint_revision(rev, paths, blobs, line_length, cache, keep_lines):
+    """Lints the Markdown blobs in rev, reading each unique blob only once.
+
+    Only the errors of each blob are kept for reuse. The lines of a
+    repeated blob are read again if keep_lines is set, for a baseline.
+    """
+    errors = {}
+    template = None
+    with _gitrev.BlobReader() as reader:
+        for path in paths:
+            start = time.perf_counter()
+            sha = blobs[path]
+            if sha in errors:
+                lines = reader.read_lines(sha) if keep_lines else None
+                checks = {
+                    name: copy.copy(check) for name, check in template.items()
+                }
+                for name, check in checks.items():
+                    check.errors = list(errors[sha][name])
+                seconds = None
+            else:
+                lines = reader.read_lines(sha)
+                checks, cached = lint(lines, line_length, cache)
+                template = checks
+                errors[sha] = {
+                    name: tuple(check.errors) for name, check in checks.items()
+                }
+                seconds = None if cached else time.perf_counter() - start
+            yield path, f"{rev}:{path}", lines, checks, seconds
+
+
+def file_size(name):
+    try:
+        return os.path.getsize(name)
+    except OSError:
+        return 0
+
+
+def parse_shard(ctx, param, value):
+    if value is None:
+        return None
+    try:
+        return _shard.parse_shard(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+class LintGroup(click.Group):
+    """Runs the lint command unless the first argument names another command,
+    so that `rplint FILE` keeps working next to `rplint merge`."""
+
+    def parse_args(self, ctx, args):
+        if not args or args[0] not in [*self.commands, "--help", "--version"]:
+            args.insert(0, "lint")
+        return super().parse_args(ctx, args)
+
+
+@click.group("rplint", cls=LintGroup)
+@click.version_option(version=__version__)
+def rplint():
+    """Checks Markdown files for common writing issues.
+
+    Runs the lint command when no other command is given.
+    """
+
+
+@rplint.command("lint")
 @click.option(
     "-l",
     "--line-length",
@@ -13,27 +161,190 @@ __version__ = "0.8.0"
     default=500,
     help="Line length to check for [500].",
 )
+@click.option(
+    "--rev",
+    metavar="REV",
+    help="Lint the Markdown files in a git revision instead of on disk.",
+)
+@click.option(
+    "--shard",
+    metavar="K/N",
+    callback=parse_shard,
+    help="Only lint the K-th of N evenly balanced shards of the files.",
+)
+@click.option(
+    "--timings",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Per-file lint times from a previous run, to balance shards.",
+)
+@click.option(
+    "--results",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write the results as JSON for `rplint merge`.",
+)
+@click.option(
+    "--cache",
+    "use_cache",
+    is_flag=True,
+    help="Reuse the results for paragraphs repeated across the files.",
+)
+@click.option(
+    "--cache-file",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Keep results for repeated paragraphs in FILE between runs. "
+    "Implies --cache.",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Ignore the known findings saved in FILE by --write-baseline.",
+)
+@click.option(
+    "--write-baseline",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Save every finding to FILE as known, and don't fail on them.",
+)
+@report_options
+@click.argument("inputs", metavar="INPUT_FILE...", nargs=-1)
+def lint_command(
+    inputs,
+    line_length,
+    rev,
+    shard,
+    timings,
+    results,
+    use_cache,
+    cache_file,
+    baseline,
+    write_baseline,
+    quiet,
+    summary,
+    max_diagnostics,
+):
+    """Checks Markdown files for common writing issues.
+
+    INPUT_FILE The Markdown file to check. With --rev, the arguments are
+    optional git pathspecs limiting which files in REV are checked.
+
+    Exits with status 1 if any check fails, and 2 if the inputs can't be
+    read.
+    """
+    if rev:
+        try:
+            listing = _gitrev.list_markdown_blobs(rev, inputs)
+        except subprocess.CalledProcessError as e:
+            raise InputError(e.stderr.decode().strip())
+        if inputs and not listing:
+            raise click.UsageError(
+                f"No Markdown files in {rev} match {' '.join(inputs)}."
+            )
+        blobs = {path: sha for path, sha, _ in listing}
+        sizes = {path: size for path, _, size in listing}
+    elif inputs:
+        # a missing file fails the run before anything is reported
+        input_file = click.Path(exists=True, dir_okay=False, allow_dash=True)
+        for name in inputs:
+            input_file.convert(name, None, None)
+        sizes = {name: file_size(name) for name in inputs}
+    else:
+        raise click.UsageError("Missing argument 'INPUT_FILE...'.")
+
+    paths = sorted(sizes)
+    if shard:
+        index, count = shard
+        past = _shard.load_timings(timings) if timings else {}
+        selected = set(_shard.assign_shards(sizes, count, past)[index - 1])
+        paths = [path for path in paths if path in selected]
+
+    cache = None
+    if use_cache or cache_file:
+        cache = _memo.BlockCache(_memo.fingerprint(line_length))
+    if cache_file:
+        cache.load(cache_file)
+    if rev:
+        keep_lines = bool(baseline or write_baseline)
+        linted = lint_revision(
+            rev, paths, blobs, line_length, cache, keep_lines
+        )
+    else:
+        linted = lint_files(paths, line_length, cache)
+    known = _baseline.load(baseline) if baseline else set()
+    found = set()
+    files = []
+    if (baseline or write_baseline) and not rev:
+        # baselines name files relative to the repository, as --rev does
+        root = _gitrev.toplevel() or os.getcwd()
+    output = reporter(quiet, summary, max_diagnostics, rev or len(inputs) > 1)
+    try:
+        for count, (path, label, lines, checks, seconds) in enumerate(
+            linted, start=1
+        ):
+            if baseline or write_baseline:
+                key = path if rev else _baseline.normalise_path(path, root)
+            if write_baseline:
+                found.update(
+                    fingerprint
+                    for _, _, fingerprint in _baseline.fingerprints(
+                        key, lines, checks
+                    )
+                )
+            if known:
+                _baseline.suppress(key, lines, checks, known)
+            output.add(label, checks)
+            files.append(_shard.file_result(path, checks, seconds))
+            # the rest only needs linting if it is being saved
+            if output.done and not (results or write_baseline):
+                output.skip(len(paths) - count)
+                break
+    finally:
+        # whatever was found is reported even if a file can't be read
+        output.close()
+    if results:
+        _shard.write_results(results, shard, files)
+    if cache_file:
+        cache.save(cache_file)
+    if write_baseline:
+        _baseline.write(write_baseline, found)
+        return
+    if output.failed:
+        sys.exit(1)
+
+
+@rplint.command("merge")
+@click.option(
+    "--write-timings",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Save the per-file lint times for balancing the next run.",
+)
 @click.argument(
-    "input_file",
-    type=click.File(mode="r"),
+    "result_files",
+    metavar="RESULTS...",
+    nargs=-1,
     required=True,
+    type=click.Path(exists=True, dir_okay=False),
 )
-@click.version_option(version=__version__)
-def rplint(input_file, line_length):
-    """Checks a Markdown file for common writing issues.
+@report_options
+def merge_command(
+    result_files, write_timings, quiet, summary, max_diagnostics
+):
+    """Combines the --results files of a sharded run into one report.
 
-    INPUT_FILE The Markdown file to check.
+    Exits with status 1 if any check failed in any shard, and 2 if the
+    results can't be merged.
     """
-    checks = {
-        name: check()
-        for name, check in _checks.__dict__.items()
-        if name.endswith("Check")
-    }
-    checks["LineLengthCheck"].line_length = line_length
-    lines = input_file.readlines()
-    for check in checks.values():
-        check.run(lines)
-        if check:
-            click.secho(check, fg="red")
-        else:
-            click.secho(f"{check}... Passes!", fg="green")
+    try:
+        files = _shard.merge_results(result_files)
+    except ValueError as e:
+        raise InputError(str(e))
+    checks = _checks.all_checks()
+    output = reporter(quiet, summary, max_diagnostics, True)
+    for result in files:
+        for name, check in checks.items():
+            errors = result["checks"].get(name, [])
+            check.errors = [_checks.Diagnostic(*error) for error in errors]
+        output.add(result["path"], checks)
+    output.close()
+    if write_timings:
+        _shard.write_timings(write_timings, files)
+    if output.failed:
+        sys.exit(1)
@@ -0,0 +1,78 @@
+"""Suppresses known findings so that rplint can gate CI on a legacy corpus.
+
+A finding is fingerprinted by a hash of its file, check and message, and
+the whitespace-normalised text of the line it's on and of the last
+non-blank line before it, rather than its line number, so it is still
+recognised after edits elsewhere in the file. When the same finding appears
+on several identical lines of a file, each one is also numbered so that a
+new copy isn't hidden by the old ones.
+
+Paths are taken relative to the top of the repository, so a finding is
+recognised however its file was named and wherever rplint was run from.
+"""
+import collections
+import hashlib
+import os
+
+from .checks import BaseChecker
+
+
+def normalise_path(path: str, root: str) -> str:
+    """Returns path relative to root, with / separators. Standard input,
+    named "-", is left alone."""
+    if path == "-":
+        return path
+    relative = os.path.relpath(os.path.realpath(path), os.path.realpath(root))
+    return relative.replace(os.sep, "/")
+
+
+def _normalised(line: str) -> str:
+    return " ".join(line.split())
+
+
+def fingerprints(
+    path: str, lines: list[str], checks: dict[str, BaseChecker]
+):
+    """Yields (check name, error, fingerprint) for each error in checks."""
+    # the last non-blank line before each line, for context
+    previous = [""]
+    for line in lines:
+        previous.append(_normalised(line) or previous[-1])
+    seen: collections.Counter[tuple] = collections.Counter()
+    for name, check in checks.items():
+        for error in check.errors:
+            if 0 < error.lineno <= len(lines):
+                content = _normalised(lines[error.lineno - 1])
+                before = previous[error.lineno - 1]
+            else:
+                content = before = ""
+            identity = (path, name, error.msg, content, before)
+            seen[identity] += 1
+            text = "\0".join([*identity, str(seen[identity])])
+            digest = hashlib.blake2b(text.encode(), digest_size=16)
+            yield name, error, digest.hexdigest()
+
+
+def suppress(path, lines, checks, known: set[str]):
+    """Removes the errors in checks whose fingerprints are in known."""
+    kept = collections.defaultdict(list)
+    for name, error, fingerprint in fingerprints(path, lines, checks):
+        if fingerprint not in known:
+            kept[name].append(error)
+    for name, check in checks.items():
+        check.errors = kept[name]
+
+
+def load(filename) -> set[str]:
+    with open(filename) as file:
+        return {
+            line.strip()
+            for line in file
+            if line.strip() and not line.startswith("#")
+        }
+
+
+def write(filename, known):
+    with open(filename, "w") as file:
+        file.write("# rplint baseline: fingerprints of known findings\n")
+        file.writelines(f"{fingerprint}\n" for fingerprint in sorted(known))
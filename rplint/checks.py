@@ -1,6 +1,8 @@
 import abc
+import itertools
 import re
 import string
+import typing
 from pathlib import Path
 
 BAD_WORDS_DIR = Path(__file__).parent.parent / "dicts"
@@ -11,47 +13,143 @@ CODE_BLOCK_DELIMITER = "```"
 
 __version__ = "0.8.0"
 
+LINK_RE = re.compile(
+    r"""
+    \[                 # literal opening square bracket
+    ([\`\(\)\*\w\s-]*) # the shown text from the line
+    \]                 # literal closing square bracket
+    \s*               # optional whitespace (is this needed?)
+    \(                # literal opening paren
+    ([^\)]*)          # group the url
+    \)                # literal closing paren
+    """,
+    flags=re.VERBOSE,
+)
+
+
+def remove_links(line: str) -> str:
+    return LINK_RE.sub(r"\g<1>", line)
+
+
+def truncate(line: str) -> str:
+    trail = "..." if len(line) > TRUNCATE_LENGTH else ""
+    return f"{line[:TRUNCATE_LENGTH]}{trail}"
+
+
+def is_fence(line: str) -> bool:
+    return line.startswith(CODE_BLOCK_DELIMITER)
+
+
+class Document:
+    """The lines of a document and the forms of them the checks read.
+
+    Each form is worked out for the whole document the first time a check
+    asks for it, then shared read-only by every check, rather than each
+    check stripping and removing links from its own copy of the lines.
+    """
+
+    # form: (the form it is made from, how each of its lines is made)
+    FORMS = {
+        "stripped": ("lines", str.strip),
+        "unlinked": ("lines", remove_links),
+        "words": ("unlinked", str.strip),
+        "fences": ("unlinked", is_fence),
+        "truncated": ("lines", truncate),
+    }
+
+    def __init__(self, lines: list[str]) -> None:
+        self.lines = list(lines)
+        self._forms: dict[str, list] = {}
+
+    @classmethod
+    def of(cls, lines) -> "Document":
+        return lines if isinstance(lines, cls) else cls(lines)
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def form(self, name: str) -> list:
+        if name == "lines":
+            return self.lines
+        if name not in self._forms:
+            source, make = self.FORMS[name]
+            self._forms[name] = list(map(make, self.form(source)))
+        return self._forms[name]
+
+    @property
+    def stripped(self) -> list[str]:
+        return self.form("stripped")
+
+    @property
+    def unlinked(self) -> list[str]:
+        """Lines with Markdown links replaced by their shown text."""
+        return self.form("unlinked")
+
+    @property
+    def words(self) -> list[str]:
+        """Stripped lines without links, as searched for bad words."""
+        return self.form("words")
+
+    @property
+    def fences(self) -> list[bool]:
+        """Whether each line opens or closes a code block."""
+        return self.form("fences")
+
+    @property
+    def truncated(self) -> list[str]:
+        """Lines shortened for display."""
+        return self.form("truncated")
+
+    def replace(self, start: int, stop: int, new_lines: list[str]):
+        """Replaces lines[start:stop], updating just those lines of the
+        forms that have already been worked out."""
+        self.lines[start:stop] = new_lines
+        end = start + len(new_lines)
+        # a form is always worked out after the one it is made from, so
+        # its source has been updated by the time it is reached
+        for name, form in self._forms.items():
+            source, make = self.FORMS[name]
+            form[start:stop] = map(make, self.form(source)[start:end])
+
+
+class Diagnostic(typing.NamedTuple):
+    lineno: int
+    column: int
+    msg: str
+
+    def __str__(self) -> str:
+        if self.column > 0:
+            return f"{self.lineno:5}:{self.column:<3}: {self.msg}"
+        return f"{self.lineno:5}: {self.msg}"
+
 
 class BaseChecker(abc.ABC):
+    # Context a check reads besides the line it checks. Results for a block
+    # of lines are only reused (see memo.py) when this context matches too.
+    lines_before = 0
+    reads_ahead = False
+
     # Feature inheritance
     def __init__(self) -> None:
         self.title = "Base Class Only"
         self.in_code_block = False
-        self.errors: list[str] = []
+        self.errors: list[Diagnostic] = []
         self.error_format = "Found '%s' in line"
 
     def __str__(self) -> str:
-        str_rep = f"{self.title}"
-        if len(self.errors) > 0:
-            str_rep += " Errors:\n"
-            for error in self.errors:
-                str_rep += f"{error:>6}\n"
-        return str_rep
+        if not self.errors:
+            return self.title
+        errors = "".join(f"{error}\n" for error in self.errors)
+        return f"{self.title} Errors:\n{errors}"
 
     def __bool__(self) -> bool:
         return len(self.errors) > 0
 
-    def truncate_line(self, line: str):
-        trail = "..." if len(line) > TRUNCATE_LENGTH else ""
-        self.trunc = f"{line[:TRUNCATE_LENGTH]}{trail}"
-
     def remove_links(self, line: str) -> str:
-        url_pattern = """
-            \[                 # literal opening square bracket
-            ([\`\(\)\*\w\s-]*) # the shown text from the line
-            \]                 # literal closing square bracket
-            \s*               # optional whitespace (is this needed?)
-            \(                # literal opening paren
-            ([^\)]*)          # group the url
-            \)                # literal closing paren
-        """
-        return re.sub(url_pattern, r"\g<1>", line, flags=re.VERBOSE)
+        return remove_links(line)
 
     def register_error(self, lineno: int, msg: str, column: int = -1):
-        if column > 0:
-            self.errors.append(f"{lineno:5}:{column:<3}: {msg}")
-        else:
-            self.errors.append(f"{lineno:5}: {msg}")
+        self.errors.append(Diagnostic(lineno, column, msg))
 
     def load_bad_words(self, filename) -> list[str]:
         with open(filename) as file:
@@ -59,20 +157,26 @@ class BaseChecker(abc.ABC):
 
     # Interface inheritance
     @abc.abstractmethod
-    def run(self, lines: list[str]):
-        pass
+    def run(
+        self,
+        lines: list[str] | Document,
+        start: int = 0,
+        stop: int | None = None,
+    ):
+        """Checks lines[start:stop]. The other lines are only there as
+        context for checks that look at neighbouring lines. Pass a Document
+        to share its preprocessed lines with other checks."""
 
 
 class WordsChecker(BaseChecker):
-    def run(self, lines):
-        for index, line in enumerate(lines, start=1):
-            self.truncate_line(line)
-            line = self.remove_links(line)
-            if line.startswith(CODE_BLOCK_DELIMITER):
+    def run(self, lines, start=0, stop=None):
+        document = Document.of(lines)
+        fences = document.fences
+        for index in range(*slice(start, stop).indices(len(document))):
+            if fences[index]:
                 self.in_code_block = not self.in_code_block
-            line = line.strip()
-            for word in self._extract(line):
-                self.check_word(index, word)
+            for word in self._extract(document.words[index]):
+                self.check_word(index + 1, word)
 
     def _extract(self, text):
         word_regex = re.compile(
@@ -122,16 +226,16 @@ class BadWordsCheck(WordsChecker):
 
 
 class LineChecker(BaseChecker):
-    def run(self, lines):
+    def run(self, lines, start=0, stop=None):
         """Keeps a state machine of whether or not we're in a code block as
         some tests only want to look outside code blocks."""
-        self.lines = [line.strip() for line in lines]
-        for index, line in enumerate(lines, start=1):
-            self.truncate_line(line)
-            line = self.remove_links(line)
-            if line.startswith(CODE_BLOCK_DELIMITER):
+        document = Document.of(lines)
+        self.lines = document.stripped
+        fences, unlinked = document.fences, document.unlinked
+        for index in range(*slice(start, stop).indices(len(document))):
+            if fences[index]:
                 self.in_code_block = not self.in_code_block
-            self.check_line(index, line)
+            self.check_line(index + 1, unlinked[index])
 
     def check_line(self, lineno, line):
         raise NotImplementedError
@@ -202,6 +306,8 @@ class CodeFormatterCheck(LineChecker):
 
 
 class EndingColonCheck(LineChecker):
+    lines_before = 2
+
     def __init__(self):
         super().__init__()
         self.title = "Ending Colon Test"
@@ -209,15 +315,16 @@ class EndingColonCheck(LineChecker):
 
     def check_line(self, lineno, line):
         if line.startswith(CODE_BLOCK_DELIMITER) and self.in_code_block:
+            # sanity check to avoid issues
+            if lineno < 3:
+                self.register_error(lineno, "Code block starts before text")
+                return
             """Because we're using a 1-based index, the actual indices into
             the self.lines array are offset by one."""
             previous_line = self.lines[lineno - 2]
             text_line = self.lines[lineno - 3]
-            # sanity check to avoid issues
-            if lineno < 3:
-                self.register_error(lineno, "Code block starts before text")
             # previous line (n-2) must be blank
-            elif len(previous_line) > 0:
+            if len(previous_line) > 0:
                 self.register_error(
                     lineno, "Line preceding code block must be blank"
                 )
@@ -235,6 +342,7 @@ class EndingColonCheck(LineChecker):
 
 class CodeBlockOrAlertEndsSectionCheck(LineChecker):
     end_block_re = re.compile(rf".*?({END_ALERT}|{CODE_BLOCK_DELIMITER})\s*")
+    reads_ahead = True
 
     def __init__(self):
         super().__init__()
@@ -243,7 +351,7 @@ class CodeBlockOrAlertEndsSectionCheck(LineChecker):
     def check_line(self, lineno, line):
         match = self.end_block_re.match(line)
         if match and not self.in_code_block:
-            for next_line in self.lines[lineno:]:
+            for next_line in itertools.islice(self.lines, lineno, None):
                 if not next_line or next_line.isspace():
                     continue
                 if next_line.startswith("#"):
@@ -298,3 +406,14 @@ class SpacesInLineCheck(LineChecker):
             self.register_error(
                 lineno, self.error_format % "double spaces in line"
             )
+
+
+def all_checks(line_length: int = 500) -> dict[str, BaseChecker]:
+    """Returns a fresh instance of every check, keyed by class name."""
+    checks = {
+        name: check()
+        for name, check in globals().items()
+        if name.endswith("Check")
+    }
+    checks["LineLengthCheck"].line_length = line_length
+    return checks
@@ -0,0 +1,91 @@
+"""Reads the Markdown files of a git revision straight from the object store,
+so a tag or an old commit can be linted without checking it out."""
+import io
+import subprocess
+
+MARKDOWN_SUFFIXES = (".md", ".markdown")
+
+
+def list_markdown_blobs(
+    rev: str, pathspecs=()
+) -> list[tuple[str, str, int]]:
+    """Returns (path, blob hash, size) for each Markdown file in rev. The
+    paths are relative to the top of the repository.
+
+    Pathspecs are relative to the current directory, as for other git
+    commands. Without any, the whole revision is listed, wherever this is
+    run from.
+    """
+    # ls-tree otherwise only lists the current directory
+    scope = "--full-name" if pathspecs else "--full-tree"
+    output = subprocess.run(
+        ["git", "ls-tree", "-r", "-l", "-z", scope, rev, "--", *pathspecs],
+        check=True,
+        capture_output=True,
+    ).stdout
+    blobs = []
+    for entry in output.decode().split("\0"):
+        if not entry:
+            continue
+        info, path = entry.split("\t", 1)
+        _, kind, sha, size = info.split()
+        if kind == "blob" and path.endswith(MARKDOWN_SUFFIXES):
+            blobs.append((path, sha, int(size)))
+    return blobs
+
+
+def toplevel() -> str | None:
+    """Returns the top of the working tree holding the current directory, or
+    None outside of a git repository."""
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel"],
+            check=True,
+            capture_output=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode().strip() or None
+
+
+class BlobReader:
+    """Feeds blob hashes to one long-lived `git cat-file --batch` process
+    rather than paying for a new git process per file."""
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.stdout.close()
+        self.process.wait()
+
+    def read(self, sha: str) -> bytes:
+        self.process.stdin.write(f"{sha}\n".encode())
+        self.process.stdin.flush()
+        # header is "<sha> <type> <size>" or "<sha> missing"
+        header = self.process.stdout.readline().split()
+        if len(header) != 3:
+            raise KeyError(f"{sha} not found in the object store")
+        data = self.process.stdout.read(int(header[2]))
+        self.process.stdout.read(1)  # newline after the contents
+        return data
+
+    def read_lines(self, sha: str) -> list[str]:
+        """Returns the blob split into lines just as readlines() would for
+        the same file on disk. Old revisions may hold files that aren't
+        UTF-8, so bad bytes are replaced rather than failing the run."""
+        text = io.TextIOWrapper(
+            io.BytesIO(self.read(sha)), encoding="utf-8", errors="replace"
+        )
+        return text.readlines()
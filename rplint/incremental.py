@@ -0,0 +1,143 @@
+"""Re-lints a document after an edit without re-checking all of it.
+
+Meant for editor integrations. The document is checked in segments of a
+fixed number of lines, and each segment records the code block state at
+its start (a checkpoint) along with the diagnostics found while checking
+it. After an edit, checking restarts at the checkpoint before the first
+line the edit can affect. It stops at the first old checkpoint past the
+edit where the code block state matches the last run again. Segments
+outside that range keep their diagnostics, moved by the change in length.
+"""
+import typing
+
+from .checks import Diagnostic, Document, all_checks
+from .memo import run_block
+
+CHECKPOINT_INTERVAL = 50
+
+
+class Segment(typing.NamedTuple):
+    start: int
+    in_code_block: bool
+    errors: dict[str, list[Diagnostic]]
+
+    def shifted(self, delta: int) -> "Segment":
+        return Segment(
+            self.start + delta,
+            self.in_code_block,
+            {
+                name: [
+                    error._replace(lineno=error.lineno + delta)
+                    for error in errors
+                ]
+                for name, errors in self.errors.items()
+            },
+        )
+
+
+class IncrementalLinter:
+    def __init__(
+        self,
+        lines: list[str],
+        line_length: int = 500,
+        interval: int = CHECKPOINT_INTERVAL,
+    ):
+        self.checks = all_checks(line_length)
+        self.document = Document(lines)
+        self.interval = interval
+        self.segments: list[Segment] = []
+        # lines after an edit whose checks still read the edited lines
+        self.lines_after = max(
+            check.lines_before for check in self.checks.values()
+        )
+        self._recheck(0, False, [], 0)
+
+    def diagnostics(self) -> dict[str, list[Diagnostic]]:
+        """Returns each check's diagnostics, as check.errors would hold them
+        after running over the whole document."""
+        return {
+            name: [
+                error
+                for segment in self.segments
+                for error in segment.errors[name]
+            ]
+            for name in self.checks
+        }
+
+    def edit(self, start: int, stop: int, new_lines: list[str]):
+        """Replaces lines[start:stop] with new_lines and re-checks the lines
+        that could be affected.
+
+        Returns the (start, stop) range of lines that were re-checked.
+        """
+        self.document.replace(start, stop, new_lines)
+        delta = len(new_lines) - (stop - start)
+
+        # Lines before the edit that read ahead over blank lines and
+        # headings into it have to be checked again too.
+        first = start
+        stripped = self.document.stripped
+        while first > 0 and (
+            not stripped[first - 1] or stripped[first - 1].startswith("#")
+        ):
+            first -= 1
+        first = max(first - 1, 0)
+
+        index = 0
+        while (
+            index + 1 < len(self.segments)
+            and self.segments[index + 1].start <= first
+        ):
+            index += 1
+        if self.segments:
+            begin = self.segments[index].start
+            state = self.segments[index].in_code_block
+        else:
+            begin, state = 0, False
+
+        # Old checkpoints are only trusted once past the lines that read
+        # back into the edit.
+        tail = [
+            segment
+            for segment in self.segments[index + 1 :]
+            if segment.start >= stop + self.lines_after
+        ]
+        del self.segments[index:]
+        return begin, self._recheck(begin, state, tail, delta)
+
+    def _recheck(self, position, state, tail, delta):
+        """Checks segments from position until the state matches one of the
+        old segments in tail, which are then kept. Returns where it
+        stopped."""
+        tail_index = 0
+        while position < len(self.document):
+            if tail_index < len(tail):
+                checkpoint = tail[tail_index].start + delta
+                if checkpoint == position and (
+                    tail[tail_index].in_code_block == state
+                ):
+                    self.segments.extend(
+                        segment.shifted(delta)
+                        for segment in tail[tail_index:]
+                    )
+                    return position
+                if checkpoint <= position:
+                    tail_index += 1
+                    continue
+                stop = min(position + self.interval, checkpoint)
+            else:
+                stop = position + self.interval
+            stop = min(stop, len(self.document))
+            state = self._check_segment(position, stop, state)
+            position = stop
+        return position
+
+    def _check_segment(self, start, stop, state):
+        """Checks lines[start:stop], saving a segment for them, and returns
+        the code block state after them."""
+        errors = {}
+        for name, check in self.checks.items():
+            errors[name] = run_block(check, self.document, start, stop, state)
+        self.segments.append(Segment(start, state, errors))
+        # every check tracks code blocks the same way, so any will do
+        return check.in_code_block
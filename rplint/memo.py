@@ -0,0 +1,188 @@
+"""Reuses check results for blocks of text that have been linted before.
+
+Tutorials share a lot of boilerplate: intros, alerts, footers and code
+snippets. A document is split into paragraphs and code blocks, and each
+check's diagnostics for a block are cached under a hash of the block, the
+code block state at its start and whatever context the check reads around
+it. A repeat of the block, in the same file or any other, replays the
+cached diagnostics moved to the block's line numbers.
+"""
+import collections
+import hashlib
+import json
+from pathlib import Path
+
+from .checks import BAD_WORDS_DIR, Diagnostic, Document
+from .checks import __version__
+
+MAX_ENTRIES = 100_000
+# the modules whose code decides what a cached result holds
+SOURCES = ["checks.py", "memo.py"]
+# bump when the layout of a saved cache changes
+CACHE_FORMAT = 1
+
+
+def fingerprint(line_length: int) -> str:
+    """Identifies everything besides the text that changes the results, so a
+    saved cache is thrown away when the settings, word lists or the code of
+    the checks change. The version alone isn't enough as the checks can
+    change between releases."""
+    digest = hashlib.blake2b(
+        f"{CACHE_FORMAT} {__version__} {line_length}".encode()
+    )
+    sources = [Path(__file__).parent / name for name in SOURCES]
+    for filename in [*sources, *sorted(BAD_WORDS_DIR.glob("*.txt"))]:
+        digest.update(filename.read_bytes())
+    return digest.hexdigest()
+
+
+class BlockCache:
+    """A bounded LRU mapping of block keys to diagnostics."""
+
+    def __init__(self, fingerprint: str, max_entries: int = MAX_ENTRIES):
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.entries: collections.OrderedDict[str, list[Diagnostic]] = (
+            collections.OrderedDict()
+        )
+
+    def get(self, key: str) -> list[Diagnostic] | None:
+        diagnostics = self.entries.get(key)
+        if diagnostics is not None:
+            self.entries.move_to_end(key)
+        return diagnostics
+
+    def put(self, key: str, diagnostics: list[Diagnostic]):
+        self.entries[key] = diagnostics
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def load(self, filename):
+        """Adds the entries saved in filename, unless they were made with a
+        different fingerprint or the file can't be read or doesn't hold a
+        cache. Nothing is added from a file that is only partly valid."""
+        try:
+            with open(filename) as file:
+                saved = json.load(file)
+            if saved["fingerprint"] != self.fingerprint:
+                return
+            entries = [
+                (key, [Diagnostic(*error) for error in diagnostics])
+                for key, diagnostics in saved["entries"]
+            ]
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        for key, diagnostics in entries:
+            self.put(key, diagnostics)
+
+    def save(self, filename):
+        with open(filename, "w") as file:
+            json.dump(
+                {
+                    "fingerprint": self.fingerprint,
+                    "entries": list(self.entries.items()),
+                },
+                file,
+            )
+
+
+def split_blocks(document: Document) -> list[tuple[int, int, bool]]:
+    """Splits a document into paragraphs and code blocks.
+
+    Returns (start, stop, in_code_block) for each block, where
+    in_code_block is the state the checks are in at its first line. Fences
+    are recognised exactly as the checks do it, so the state always agrees.
+    """
+    blocks = []
+    start = 0
+    start_state = in_code_block = False
+    for index, is_fence in enumerate(document.fences):
+        if is_fence and not in_code_block and index > start:
+            # an opening fence starts a new block
+            blocks.append((start, index, start_state))
+            start, start_state = index, in_code_block
+        if is_fence:
+            in_code_block = not in_code_block
+        if (is_fence and not in_code_block) or (
+            not in_code_block and not document.stripped[index]
+        ):
+            # a closing fence or a blank line ends the block
+            blocks.append((start, index + 1, start_state))
+            start, start_state = index + 1, in_code_block
+    if start < len(document):
+        blocks.append((start, len(document), start_state))
+    return blocks
+
+
+def context_range(check, document: Document, start, stop):
+    """Returns the range of lines that check reads while checking
+    lines[start:stop]. A look-ahead check reads on past any blank lines and
+    headings to the first line that is neither."""
+    first = max(0, start - check.lines_before)
+    if not check.reads_ahead:
+        return first, stop
+    for index in range(stop, len(document)):
+        line = document.stripped[index]
+        if line and not line.startswith("#"):
+            return first, index + 1
+    return first, len(document)
+
+
+def run_block(check, document: Document, start, stop, in_code_block):
+    """Runs check over lines[start:stop] starting from the given code block
+    state. The diagnostics are returned rather than kept. Afterwards
+    check.in_code_block is the state after the block."""
+    check.in_code_block = in_code_block
+    count = len(check.errors)
+    check.run(document, start, stop)
+    diagnostics = check.errors[count:]
+    del check.errors[count:]
+    return diagnostics
+
+
+def run_checks(checks, lines, cache: BlockCache) -> tuple[int, int]:
+    """Runs each check over lines, reusing cached results for known
+    blocks. The checks end up with the same errors as check.run(lines).
+
+    Returns how many results were reused from the cache and how many had
+    to be checked.
+    """
+    document = Document.of(lines)
+    hits = misses = 0
+    for start, stop, in_code_block in split_blocks(document):
+        # checks that read the same context share one hash of it
+        contexts = {}
+        for name, check in checks.items():
+            first, end = context_range(check, document, start, stop)
+            if (first, end) not in contexts:
+                text = json.dumps(
+                    [
+                        in_code_block,
+                        start - first,
+                        stop - first,
+                        document.lines[first:end],
+                    ]
+                )
+                digest = hashlib.blake2b(text.encode(), digest_size=16)
+                contexts[first, end] = digest.hexdigest()
+            key = f"{name}:{contexts[first, end]}"
+            # cached diagnostics are numbered from the start of the context
+            # so they can be replayed wherever the same text turns up
+            diagnostics = cache.get(key)
+            if diagnostics is None:
+                diagnostics = [
+                    error._replace(lineno=error.lineno - first)
+                    for error in run_block(
+                        check, document, start, stop, in_code_block
+                    )
+                ]
+                cache.put(key, diagnostics)
+                misses += 1
+            else:
+                hits += 1
+            check.errors.extend(
+                error._replace(lineno=error.lineno + first)
+                for error in diagnostics
+            )
+    return hits, misses
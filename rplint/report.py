@@ -0,0 +1,142 @@
+"""Renders lint results.
+
+Output is built up in a buffer and written in large pieces rather than one
+terminal write per check, and is only coloured when stdout is a terminal.
+"""
+import collections
+import sys
+
+import click
+
+from .checks import BaseChecker
+
+BUFFER_SIZE = 64 * 1024
+
+FULL = "full"
+SUMMARY = "summary"
+QUIET = "quiet"
+
+
+def plural(count: int, noun: str) -> str:
+    return f"{count} {noun}" if count == 1 else f"{count} {noun}s"
+
+
+class Reporter:
+    """Collects the results for each file and writes them out.
+
+    In FULL mode each check is listed for each file with its errors sorted
+    by line and column. SUMMARY mode only counts the errors for each check
+    and file, and QUIET mode writes nothing so only the exit status is left.
+    """
+
+    def __init__(
+        self,
+        mode: str = FULL,
+        max_diagnostics: int | None = None,
+        show_paths: bool = True,
+    ):
+        self.mode = mode
+        self.max_diagnostics = max_diagnostics
+        self.show_paths = show_paths
+        self.color = sys.stdout.isatty()
+        self.buffer: list[str] = []
+        self.buffered = 0
+        self.files = 0
+        self.diagnostics = 0
+        # set once an error is left out because the report is done
+        self.cut_off = False
+        self.unchecked = 0
+        self.per_check: collections.Counter[str] = collections.Counter()
+        self.per_file: dict[str, int] = {}
+
+    @property
+    def failed(self) -> bool:
+        return self.diagnostics > 0
+
+    @property
+    def done(self) -> bool:
+        """True once more results can't change the output or exit status."""
+        if self.mode == QUIET:
+            return self.failed
+        return (
+            self.max_diagnostics is not None
+            and self.diagnostics >= self.max_diagnostics
+        )
+
+    def add(self, label: str, checks: dict[str, BaseChecker]):
+        """Adds the results for one file, unless the report is done."""
+        self.files += 1
+        if self.done:
+            if any(check.errors for check in checks.values()):
+                self.cut_off = True
+            return
+        if self.show_paths and self.mode == FULL:
+            self.write(label + "\n", bold=True)
+        count = 0
+        for position, check in enumerate(checks.values()):
+            errors = sorted(check.errors, key=lambda error: error[:2])
+            if self.max_diagnostics is not None:
+                budget = self.max_diagnostics - self.diagnostics
+                if len(errors) > budget:
+                    self.cut_off = True
+                    errors = errors[:budget]
+            self.diagnostics += len(errors)
+            count += len(errors)
+            if errors:
+                self.per_check[check.title] += len(errors)
+            if self.mode == FULL:
+                if errors:
+                    lines = "".join(f"{error}\n" for error in errors)
+                    self.write(f"{check.title} Errors:\n{lines}\n", fg="red")
+                else:
+                    self.write(f"{check.title}... Passes!\n", fg="green")
+            if self.done:
+                later = list(checks.values())[position + 1 :]
+                if any(check.errors for check in later):
+                    self.cut_off = True
+                break
+        if count:
+            self.per_file[label] = count
+
+    def skip(self, count: int):
+        """Counts files that were left unchecked once the report was done.
+        They may or may not have had errors."""
+        self.files += count
+        self.unchecked += count
+
+    def close(self):
+        """Writes the summary, if any, and whatever is still buffered."""
+        if self.mode == SUMMARY:
+            for label, count in self.per_file.items():
+                self.write(f"{label}: {count}\n", bold=True)
+            for title, count in self.per_check.most_common():
+                self.write(f"{count:7} {title}\n", fg="red")
+            self.write(
+                f"{plural(self.diagnostics, 'error')} in "
+                f"{len(self.per_file)} of {plural(self.files, 'file')}\n",
+                fg="red" if self.failed else "green",
+            )
+        if (self.cut_off or self.unchecked) and self.mode != QUIET:
+            limit = plural(self.max_diagnostics, "error")
+            notice = f"Stopped at the limit of {limit}"
+            if self.unchecked:
+                unchecked = plural(self.unchecked, "file")
+                notice += f" with {unchecked} left unchecked"
+            self.write(f"{notice}.\n")
+        self.flush()
+
+    def write(self, text: str, **style):
+        if self.mode == QUIET:
+            return
+        if self.color and style:
+            text = click.style(text, **style)
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if self.buffered >= BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            click.echo("".join(self.buffer), nl=False, color=self.color)
+        self.buffer = []
+        self.buffered = 0
@@ -0,0 +1,108 @@
+"""Splits a lint run across CI nodes and merges the per-shard results.
+
+Every node is given the same file list and timings file, so each one works
+out the same assignment on its own and keeps only the files for its shard.
+"""
+import heapq
+import json
+
+from .checks import BaseChecker
+
+
+def parse_shard(text: str) -> tuple[int, int]:
+    """Parses "K/N" into (K, N) where shards are numbered from 1."""
+    index, _, count = text.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"shard must look like K/N, not '{text}'")
+    if not 1 <= index <= count:
+        raise ValueError(f"shard {index} is not between 1 and {count}")
+    return index, count
+
+
+def load_timings(filename) -> dict[str, float]:
+    with open(filename) as file:
+        return json.load(file)
+
+
+def assign_shards(
+    sizes: dict[str, int], count: int, timings: dict[str, float]
+) -> list[list[str]]:
+    """Splits the files into count shards with roughly equal lint time.
+
+    A file's cost is its time from the last run where one is known. Other
+    files are costed by size, scaled by the average time per byte of the
+    files that were timed. Files are then handed out largest first to
+    whichever shard has the least work so far.
+    """
+    timed = [path for path in sizes if path in timings]
+    timed_bytes = sum(sizes[path] for path in timed)
+    if timed_bytes:
+        per_byte = sum(timings[path] for path in timed) / timed_bytes
+    else:
+        per_byte = 1.0
+
+    def cost(path):
+        return timings.get(path, sizes[path] * per_byte)
+
+    shards: list[list[str]] = [[] for _ in range(count)]
+    loads = [(0.0, index) for index in range(count)]
+    for path in sorted(sizes, key=lambda path: (-cost(path), path)):
+        load, index = heapq.heappop(loads)
+        shards[index].append(path)
+        heapq.heappush(loads, (load + cost(path), index))
+    return shards
+
+
+def file_result(
+    path: str, checks: dict[str, BaseChecker], seconds: float | None
+) -> dict:
+    """seconds is None when the results were reused rather than worked out,
+    so they don't skew the timings used for balancing."""
+    return {
+        "path": path,
+        "seconds": seconds,
+        "checks": {
+            name: [list(error) for error in check.errors]
+            for name, check in checks.items()
+        },
+    }
+
+
+def write_results(filename, shard, files: list[dict]):
+    with open(filename, "w") as file:
+        json.dump({"shard": shard, "files": files}, file, indent=1)
+
+
+def write_timings(filename, files: list[dict]):
+    with open(filename, "w") as file:
+        timings = {
+            result["path"]: result["seconds"]
+            for result in files
+            if result["seconds"] is not None
+        }
+        json.dump(timings, file, indent=1)
+
+
+def merge_results(filenames) -> list[dict]:
+    """Combines shard result files, making sure no shard is missing."""
+    files = []
+    shards = set()
+    for filename in filenames:
+        with open(filename) as file:
+            results = json.load(file)
+        if results["shard"]:
+            index, count = results["shard"]
+            if (index, count) in shards:
+                raise ValueError(f"shard {index}/{count} given more than once")
+            shards.add((index, count))
+        files.extend(results["files"])
+    counts = {count for _, count in shards}
+    if len(counts) > 1:
+        raise ValueError(f"results come from different shard counts {counts}")
+    for count in counts:
+        missing = set(range(1, count + 1)) - {index for index, _ in shards}
+        if missing:
+            raise ValueError(f"no results for shard(s) {sorted(missing)}")
+    return sorted(files, key=lambda result: result["path"])
@@ -25,6 +25,12 @@ def test(c):
     pytest.main(["tests"])
 
 
+@task
+def bench(c):
+    """Run the benchmarks."""
+    run("python benchmarks/preprocessing.py")
+
+
 @task
 def tox(c):
     """Run tox to test all supported Python versions."""
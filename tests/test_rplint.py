@@ -1,6 +1,11 @@
+import subprocess
+
 import pytest
+from click.testing import CliRunner
 
 import rplint
+from rplint import baseline, gitrev, incremental, memo, shard
+from rplint.__main__ import rplint as rplint_cli
 
 
 def test_contraction():
@@ -351,3 +356,414 @@ def test_url_line_length():
     dut.line_length = 500
     dut.run([too_long])
     assert bool(dut)
+
+
+@pytest.fixture
+def git_repo(tmp_path, monkeypatch):
+    """A throwaway repository with one commit tagged v1."""
+    monkeypatch.chdir(tmp_path)
+
+    def git(*args):
+        subprocess.run(["git", *args], check=True, capture_output=True)
+
+    git("init", "-q")
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "good.md").write_text("All fine here.\n")
+    (tmp_path / "docs" / "copy.md").write_text("This is OK.\n")
+    (tmp_path / "bad.md").write_text("This is OK.\n")
+    (tmp_path / "notes.txt").write_text("This is OK.\n")
+    latin = "Caf\xe9 menu\n".encode("latin-1")
+    (tmp_path / "docs" / "latin.md").write_bytes(latin)
+    git("add", ".")
+    git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "v1")
+    git("tag", "v1")
+    # the working tree no longer matters once committed
+    (tmp_path / "bad.md").write_text("All fine now.\n")
+    return tmp_path
+
+
+def test_git_revision_blobs(git_repo, monkeypatch):
+    listing = gitrev.list_markdown_blobs("v1")
+    blobs = {path: sha for path, sha, _ in listing}
+    assert sorted(blobs) == [
+        "bad.md",
+        "docs/copy.md",
+        "docs/good.md",
+        "docs/latin.md",
+    ]
+    assert blobs["bad.md"] == blobs["docs/copy.md"]
+    assert gitrev.list_markdown_blobs("v1", ["docs"]) == [
+        ("docs/copy.md", blobs["docs/copy.md"], 12),
+        ("docs/good.md", blobs["docs/good.md"], 15),
+        ("docs/latin.md", blobs["docs/latin.md"], 10),
+    ]
+    # the whole revision is listed from a subdirectory, pathspecs are
+    # relative to it
+    monkeypatch.chdir(git_repo / "docs")
+    assert gitrev.list_markdown_blobs("v1") == listing
+    assert gitrev.list_markdown_blobs("v1", ["good.md"]) == [
+        ("docs/good.md", blobs["docs/good.md"], 15),
+    ]
+    monkeypatch.chdir(git_repo)
+
+    with gitrev.BlobReader() as reader:
+        assert reader.read_lines(blobs["docs/good.md"]) == ["All fine here.\n"]
+        assert reader.read_lines(blobs["bad.md"]) == ["This is OK.\n"]
+        latin = reader.read_lines(blobs["docs/latin.md"])
+        assert latin == ["Caf\ufffd menu\n"]
+        with pytest.raises(KeyError):
+            reader.read("0" * 40)
+
+
+def test_cli_lints_revision(git_repo):
+    result = CliRunner().invoke(rplint_cli, ["--rev", "v1", "docs"])
+    assert result.exit_code == 1
+    assert "v1:docs/copy.md" in result.output
+    assert "v1:bad.md" not in result.output
+    assert "v1:docs/latin.md" in result.output
+    assert "Found 'OK' in line" in result.output
+
+    # bad.md and docs/copy.md are the same blob, linted once
+    result = CliRunner().invoke(rplint_cli, ["--rev", "v1"])
+    assert result.output.count("Found 'OK' in line") == 2
+    args = ["--rev", "v1", "--results", "results.json"]
+    CliRunner().invoke(rplint_cli, args)
+    timings = {
+        result["path"]: result["seconds"]
+        for result in shard.merge_results(["results.json"])
+    }
+    # the reused blob wasn't timed, so it can't skew shard balancing
+    assert timings["bad.md"] is not None and timings["docs/copy.md"] is None
+    args = ["--rev", "v1", "--write-baseline", "known.txt"]
+    assert CliRunner().invoke(rplint_cli, args).exit_code == 0
+    args = ["--rev", "v1", "--baseline", "known.txt"]
+    assert CliRunner().invoke(rplint_cli, args).exit_code == 0
+
+    result = CliRunner().invoke(rplint_cli, ["--rev", "nope"])
+    assert result.exit_code == 2
+    # a mistyped path fails rather than passing with nothing checked
+    result = CliRunner().invoke(rplint_cli, ["--rev", "v1", "typo.md"])
+    assert result.exit_code == 2
+    assert "No Markdown files in v1 match typo.md." in result.output
+
+
+def test_shard_assignment():
+    assert shard.parse_shard("2/3") == (2, 3)
+    for bad in ["3", "0/3", "4/3", "a/b"]:
+        with pytest.raises(ValueError):
+            shard.parse_shard(bad)
+
+    sizes = {"a.md": 100, "b.md": 100, "c.md": 100, "d.md": 300}
+    # without timings the files are balanced by size
+    assert shard.assign_shards(sizes, 2, {}) == [
+        ["d.md"],
+        ["a.md", "b.md", "c.md"],
+    ]
+    # a.md was slow last time; c.md and d.md get the average time per byte
+    timings = {"a.md": 9.0, "b.md": 1.0}
+    assert shard.assign_shards(sizes, 2, timings) == [
+        ["d.md"],
+        ["a.md", "c.md", "b.md"],
+    ]
+
+
+def test_cli_shards_and_merges(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "bad.md").write_text("This is OK.\n")
+    (tmp_path / "good.md").write_text("All fine here.\n" * 10)
+    runner = CliRunner()
+    outputs = []
+    for index in (1, 2):
+        args = ["--shard", f"{index}/2", "--results", f"{index}.json"]
+        outputs.append(runner.invoke(rplint_cli, [*args, "bad.md", "good.md"]))
+    assert [result.exit_code for result in outputs] == [0, 1]
+    assert "good.md" in outputs[0].output
+    assert "bad.md" in outputs[1].output
+
+    result = runner.invoke(rplint_cli, ["merge", "1.json"])
+    assert result.exit_code == 2
+    assert "no results for shard(s) [2]" in result.output
+    result = runner.invoke(rplint_cli, ["merge", "1.json", "2.json", "1.json"])
+    assert result.exit_code == 2
+    assert "shard 1/2 given more than once" in result.output
+
+    result = runner.invoke(
+        rplint_cli, ["merge", "--write-timings", "t.json", "2.json", "1.json"]
+    )
+    assert result.exit_code == 1
+    assert result.output.index("bad.md") < result.output.index("good.md")
+    assert "    1: Found 'OK' in line" in result.output
+    assert sorted(shard.load_timings("t.json")) == ["bad.md", "good.md"]
+
+
+BOILERPLATE = """\
+This is OK, but it is boilerplate
+```
+print("no formatter")
+```
+## Next Section
+
+"""
+
+
+def test_block_memo_matches_full_run(tmp_path):
+    text = "Intro\n\n" + BOILERPLATE + "Middle:\n\n" + BOILERPLATE
+    lines = text.splitlines(keepends=True)
+    expected = rplint.checks.all_checks()
+    for check in expected.values():
+        check.run(lines)
+
+    cache = memo.BlockCache("test")
+    checks = rplint.checks.all_checks()
+    hits, misses = memo.run_checks(checks, lines, cache)
+    assert hits and misses
+    for name, check in checks.items():
+        assert check.errors == expected[name].errors
+    # a second run replays everything
+    assert memo.run_checks(rplint.checks.all_checks(), lines, cache)[1] == 0
+    # the repeated boilerplate was replayed at its own line numbers
+    assert {error.lineno for error in checks["BadWordsCheck"].errors} == {
+        3,
+        11,
+    }
+
+    cache.save(tmp_path / "cache.json")
+    reloaded = memo.BlockCache("test")
+    reloaded.load(tmp_path / "cache.json")
+    assert reloaded.entries == cache.entries
+    stale = memo.BlockCache("other settings")
+    stale.load(tmp_path / "cache.json")
+    assert not stale.entries
+    # files that aren't a cache are ignored too
+    for text in ["[]", '{"fingerprint": "test"}', "not json", '"test"']:
+        (tmp_path / "bad.json").write_text(text)
+        broken = memo.BlockCache("test")
+        broken.load(tmp_path / "bad.json")
+        assert not broken.entries
+    (tmp_path / "bad.json").write_text(
+        '{"fingerprint": "test", "entries": [["a", []], ["b", [[1]]]]}'
+    )
+    broken.load(tmp_path / "bad.json")
+    assert not broken.entries
+
+
+def test_cache_fingerprint(monkeypatch):
+    assert memo.fingerprint(500) == memo.fingerprint(500)
+    assert memo.fingerprint(500) != memo.fingerprint(80)
+    # a change to the checks' code invalidates a saved cache
+    before = memo.fingerprint(500)
+    monkeypatch.setattr(memo, "CACHE_FORMAT", memo.CACHE_FORMAT + 1)
+    assert memo.fingerprint(500) != before
+    monkeypatch.undo()
+    monkeypatch.setattr(memo, "SOURCES", ["memo.py"])
+    assert memo.fingerprint(500) != before
+
+
+def test_cli_cache_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.md").write_text(BOILERPLATE)
+    (tmp_path / "b.md").write_text(BOILERPLATE)
+
+    def run(*args):
+        args = ["a.md", "b.md", "--results", "results.json", *args]
+        output = CliRunner().invoke(rplint_cli, args).output
+        results = shard.merge_results(["results.json"])
+        timings = {result["path"]: result["seconds"] for result in results}
+        return output, timings
+
+    output, timings = run()
+    assert None not in timings.values()
+    assert not (tmp_path / "cache.json").exists()
+    # b.md is entirely replayed from a.md's results, so it isn't timed
+    cached_output, timings = run("--cache")
+    assert cached_output == output
+    assert timings["a.md"] is not None and timings["b.md"] is None
+    cached_output, timings = run("--cache-file", "cache.json")
+    assert cached_output == output
+    assert (tmp_path / "cache.json").exists()
+
+    # files that only share a few blocks, like blank lines after code
+    # blocks, are still timed
+    (tmp_path / "a.md").write_text("Intro\n\n" + BOILERPLATE * 2)
+    (tmp_path / "b.md").write_text("Other text\n\n```\nx\n```\n\n")
+    _, timings = run("--cache")
+    assert None not in timings.values()
+
+
+def test_block_cache_is_bounded():
+    cache = memo.BlockCache("test", max_entries=2)
+    cache.put("a", [])
+    cache.put("b", [])
+    cache.get("a")
+    cache.put("c", [])
+    assert list(cache.entries) == ["a", "c"]
+
+
+def test_incremental_edit():
+    def full_run(lines):
+        checks = rplint.checks.all_checks()
+        for check in checks.values():
+            check.run(lines)
+        return {name: check.errors for name, check in checks.items()}
+
+    lines = ("Plain text here\n\n" + BOILERPLATE) * 10
+    lines = lines.splitlines(keepends=True)
+    dut = incremental.IncrementalLinter(lines, interval=5)
+    assert dut.diagnostics() == full_run(lines)
+
+    # fix a line in the middle: only the nearby segments are checked again
+    start = lines.index("This is OK, but it is boilerplate\n", 30)
+    lines[start : start + 1] = ["A fine line\n", "and another:\n"]
+    rechecked = dut.edit(start, start + 1, lines[start : start + 2])
+    assert dut.diagnostics() == full_run(lines)
+    assert rechecked[0] <= start and rechecked[1] - rechecked[0] < 20
+
+    # an unclosed fence changes the state for the rest of the document
+    dut.edit(2, 2, ["```python\n"])
+    lines[2:2] = ["```python\n"]
+    assert dut.diagnostics() == full_run(lines)
+
+
+def test_baseline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    article = tmp_path / "article.md"
+    article.write_text("This is OK.\n\nThis is OK.\n")
+    runner = CliRunner()
+    result = runner.invoke(
+        rplint_cli, ["--write-baseline", "known.txt", "article.md"]
+    )
+    assert result.exit_code == 0
+    assert len(baseline.load("known.txt")) == 2
+
+    # known findings are still recognised after the lines move
+    article.write_text("\n\tThis is OK.\n\n\nThis is OK.\n\nThe end.\n")
+    args = ["--baseline", "known.txt", "article.md"]
+    result = runner.invoke(rplint_cli, args)
+    assert result.exit_code == 0
+    assert "Bad Word Test... Passes!" in result.output
+    # however the file is named
+    args = ["--baseline", "known.txt", "./article.md"]
+    assert runner.invoke(rplint_cli, args).exit_code == 0
+    args = ["--baseline", "known.txt", str(article)]
+    assert runner.invoke(rplint_cli, args).exit_code == 0
+
+    # but another copy of the same finding is new
+    article.write_text("This is OK.\n" * 3)
+    result = runner.invoke(rplint_cli, args)
+    assert result.exit_code == 1
+    assert "    3: Found 'OK' in line" in result.output
+    assert "    1: Found" not in result.output
+
+
+def test_baseline_paths(git_repo, monkeypatch):
+    runner = CliRunner()
+    args = ["--write-baseline", "known.txt", "docs/copy.md"]
+    assert runner.invoke(rplint_cli, args).exit_code == 0
+
+    # paths are relative to the repository, wherever rplint is run
+    monkeypatch.chdir(git_repo / "docs")
+    args = ["--baseline", "../known.txt", "copy.md"]
+    assert runner.invoke(rplint_cli, args).exit_code == 0
+    # and match the paths in a revision
+    args = ["--baseline", "../known.txt", "--rev", "v1", "."]
+    result = runner.invoke(rplint_cli, args)
+    assert result.exit_code == 0
+    assert "v1:docs/copy.md" in result.output
+    assert "v1:bad.md" not in result.output
+
+    # a finding after a different line is new
+    (git_repo / "docs" / "copy.md").write_text("Intro.\nThis is OK.\n")
+    args = ["--baseline", "../known.txt", "copy.md"]
+    assert runner.invoke(rplint_cli, args).exit_code == 1
+
+
+def test_document_is_shared():
+    dut = rplint.Document(["See [here](http://x.com)  \n", "```\n"])
+    assert dut.unlinked == ["See here  \n", "```\n"]
+    assert dut.words == ["See here", "```"]
+    assert dut.fences == [False, True]
+    # every check reads the same lists rather than its own copies
+    checks = rplint.checks.all_checks()
+    for check in checks.values():
+        check.run(dut)
+    assert checks["EndingColonCheck"].lines is dut.stripped
+    assert bool(checks["SpacesInLineCheck"])
+
+    dut.replace(1, 2, ["text\n", "more text\n"])
+    assert dut.lines[1:] == ["text\n", "more text\n"]
+    assert dut.fences == [False, False, False]
+    assert dut.words == ["See here", "text", "more text"]
+    assert dut.stripped[1:] == ["text", "more text"]
+
+
+def test_cli_output_modes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.md").write_text("it is OK.\n\nThis is OK.\n")
+    (tmp_path / "b.md").write_text("This is OK.\n")
+    runner = CliRunner()
+
+    result = runner.invoke(rplint_cli, ["b.md", "a.md"])
+    assert result.exit_code == 1
+    # files are reported in order and errors in line and column order
+    assert result.output.index("a.md") < result.output.index("b.md")
+    assert "\x1b[" not in result.output
+
+    result = runner.invoke(rplint_cli, ["--summary", "a.md", "b.md"])
+    assert result.output.splitlines() == [
+        "a.md: 3",
+        "b.md: 1",
+        "      3 Bad Word Test",
+        "      1 Contraction Test",
+        "4 errors in 2 of 2 files",
+    ]
+    result = runner.invoke(rplint_cli, ["--summary", "b.md"])
+    assert result.output.splitlines()[-1] == "1 error in 1 of 1 file"
+
+    result = runner.invoke(rplint_cli, ["--max-diagnostics", "1", "a.md"])
+    assert result.exit_code == 1
+    assert result.output == (
+        "Bad Word Test Errors:\n"
+        "    1: Found 'OK' in line\n\n"
+        "Stopped at the limit of 1 error.\n"
+    )
+    # the notice is only shown when errors were left out
+    args = ["--summary", "--max-diagnostics", "4", "a.md", "b.md"]
+    result = runner.invoke(rplint_cli, args)
+    assert result.output.endswith("4 errors in 2 of 2 files\n")
+    args = ["--summary", "--max-diagnostics", "3", "a.md"]
+    result = runner.invoke(rplint_cli, args)
+    assert "Stopped" not in result.output
+    args = ["--summary", "--max-diagnostics", "2", "a.md"]
+    result = runner.invoke(rplint_cli, args)
+    assert result.output.endswith("Stopped at the limit of 2 errors.\n")
+    # or files were never checked, whether or not they have errors
+    (tmp_path / "c.md").write_text("All fine.\n")
+    for name in ["b.md", "c.md"]:
+        args = ["--summary", "--max-diagnostics", "3", "a.md", name]
+        result = runner.invoke(rplint_cli, args)
+        assert result.output.endswith(
+            "3 errors in 1 of 2 files\n"
+            "Stopped at the limit of 3 errors with 1 file left unchecked.\n"
+        )
+
+    result = runner.invoke(rplint_cli, ["--quiet", "a.md", "b.md"])
+    assert (result.exit_code, result.output) == (1, "")
+
+
+def test_cli_input_errors(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.md").write_text("This is OK.\n")
+    (tmp_path / "b.md").write_bytes(b"Caf\xe9\n")
+    runner = CliRunner()
+
+    # missing files are found before anything is checked
+    result = runner.invoke(rplint_cli, ["a.md", "missing.md"])
+    assert result.exit_code == 2
+    assert "'missing.md' does not exist" in result.output
+    assert "a.md" not in result.output
+
+    # the files checked before one that can't be read are still reported
+    result = runner.invoke(rplint_cli, ["a.md", "b.md"])
+    assert result.exit_code == 2
+    assert "Found 'OK' in line" in result.output
+    assert "Could not read file 'b.md'" in result.output